@@ -1,44 +1,230 @@
 #!/usr/bin/env python3
 
 import argparse
+import orjson
 import requests
-import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fpdf import FPDF
 import os
 import re
+import sys
 import tempfile
-from sympy.parsing.latex import parse_latex
-from sympy import pretty
+import functools
+import hashlib
+import math
+import mistune
+import html
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlparse
+
+# Shared session so every GitHub call reuses pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    # Only transient 5xx are retried here; rate limits (403/429 and Retry-After) are left to
+    # github_request. raise_on_status=False hands back the last 5xx so callers can skip or
+    # raise_for_status as before
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ),
+))
+
+# README parsers: an AST for the PDF renderer and escaped HTML for the HTML portfolio
+_MARKDOWN_PLUGINS = ["strikethrough", "table", "math", "url"]
+# speedup parses paragraphs ~30% faster but skips bare-URL autolinks (printed as plain text in
+# the PDF anyway) and leaves soft line breaks inside text tokens, see unescape_text
+_MARKDOWN_AST = mistune.create_markdown(renderer=None, plugins=["speedup", "strikethrough", "table", "math"])
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+
+class _ReadmeHTMLRenderer(mistune.HTMLRenderer):
+    # README headings start at <h4> so they stay below the repo's <h2> and <h3>README
+    def heading(self, text, level, **attrs):
+        return super().heading(text, min(level + 3, 6), **attrs)
+
+_MARKDOWN_HTML = mistune.create_markdown(renderer=_ReadmeHTMLRenderer(escape=True), plugins=_MARKDOWN_PLUGINS)
+
+# On-disk ETag cache; conditional requests answered with 304 don't count against the rate limit
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ghportfolio")
+ETAGS_PATH = os.path.join(CACHE_DIR, "etags.json")
+_etags = None
+_etags_dirty = False
+_etags_lock = threading.Lock()
+
+# Last seen X-RateLimit-Remaining/Reset per GitHub rate-limit resource
+_rate_limits = {}
+_rate_limits_lock = threading.Lock()
+
+# Calendar month labels, indexed straight from the "YYYY-MM-DD" day dates
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
 class PDF(FPDF):
+    _font_key = None
+
+    def set_font(self, family, style='', size=0):
+        # Skip fpdf's normalisation when the same font was just requested; an
+        # empty font_family means fpdf reset it for a new page and must re-emit
+        key = (family, style, size)
+        if self.font_family and key == self._font_key:
+            return
+        super().set_font(family, style, size)
+        self._font_key = key
+
+    def fill_squares(self, points, size):
+        # Same operators as rect(x, y, size, size, "F"), written to the page in a single call
+        k = self.k
+        s = size * k
+        self._out('\n'.join(f'{x * k:.2f} {(self.h - y) * k:.2f} {s:.2f} {-s:.2f} re f' for x, y in points))
+
     def footer(self):
         self.set_y(-15)
         self.set_font('helvetica', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', align='C')
 
+def _retry_delay(resp):
+    # Seconds to wait before retrying a rate-limited response, or None if it isn't one
+    if resp.status_code not in (403, 429):
+        return None
+    if "Retry-After" in resp.headers:
+        return int(resp.headers["Retry-After"])
+    if resp.headers.get("X-RateLimit-Remaining") == "0":
+        return max(int(resp.headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+    if resp.status_code == 429 or "rate limit" in resp.text.lower():
+        return 60  # Secondary rate limit without Retry-After, GitHub asks for at least a minute
+    return None
+
+def github_request(method, url, max_retries=3, **kwargs):
+    # Session request that waits out GitHub rate limits instead of failing
+    resource = "graphql" if url.endswith("/graphql") else "core"
+    with _rate_limits_lock:
+        remaining, reset = _rate_limits.get(resource, (None, None))
+    if remaining is not None and remaining < 2 and reset > time.time():
+        print(f"GitHub rate limit nearly exhausted, waiting {reset - time.time():.0f}s for reset", file=sys.stderr)
+        time.sleep(reset - time.time())
+
+    for attempt in range(max_retries + 1):
+        resp = SESSION.request(method, url, **kwargs)
+        if "X-RateLimit-Remaining" in resp.headers:
+            with _rate_limits_lock:
+                _rate_limits[resource] = (int(resp.headers["X-RateLimit-Remaining"]), int(resp.headers["X-RateLimit-Reset"]))
+        delay = _retry_delay(resp)
+        if delay is None or attempt == max_retries:
+            return resp
+        print(f"Rate limited by GitHub, retrying in {delay:.0f}s", file=sys.stderr)
+        time.sleep(delay)
+
+def _load_etags():
+    global _etags
+    if _etags is None:
+        try:
+            with open(ETAGS_PATH, "rb") as f:
+                _etags = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            _etags = {}
+    return _etags
+
+def cached_get(url, headers):
+    # GET that revalidates against the ETag cache and serves the stored body on 304
+    global _etags_dirty
+    headers = dict(headers)
+    key = f"{headers.get('Accept', '')} {url}"
+    with _etags_lock:
+        entry = _load_etags().get(key)
+    if entry and os.path.exists(entry["path"]):
+        headers["If-None-Match"] = entry["etag"]
+    else:
+        entry = None
+    resp = github_request("GET", url, headers=headers)
+    if resp.status_code == 304 and entry:
+        with open(entry["path"], "rb") as f:
+            resp._content = f.read()
+        resp.status_code = 200
+        resp.encoding = entry.get("encoding")
+        if entry.get("link") and "Link" not in resp.headers:
+            resp.headers["Link"] = entry["link"]
+    elif resp.status_code == 200 and resp.headers.get("ETag"):
+        path = os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest())
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(resp.content)
+        except OSError:
+            return resp  # Caching is best effort
+        with _etags_lock:
+            _load_etags()[key] = {
+                "etag": resp.headers["ETag"],
+                "path": path,
+                "encoding": resp.encoding,
+                "link": resp.headers.get("Link"),
+            }
+            _etags_dirty = True
+    return resp
+
+def save_etags():
+    # Write the ETag index once per batch of requests rather than on every response
+    global _etags_dirty
+    with _etags_lock:
+        if not _etags_dirty:
+            return
+        try:
+            with open(ETAGS_PATH + ".tmp", "wb") as f:
+                f.write(orjson.dumps(_etags))
+            os.replace(ETAGS_PATH + ".tmp", ETAGS_PATH)
+        except OSError:
+            return  # Caching is best effort
+        _etags_dirty = False
+
 def fetch_repos(username, token=None):
     headers = {}
     if token:
         headers["Authorization"] = f"token {token}"
-    repos = []
     url = f"https://api.github.com/users/{username}/repos?type=public&per_page=100"
-    while url:
-        resp = requests.get(url, headers=headers)
-        resp.raise_for_status()
-        repos.extend(resp.json())
-        url = resp.links.get("next", {}).get("url")
+    resp = cached_get(url, headers)
+    resp.raise_for_status()
+    repos = orjson.loads(resp.content)
+
+    # The first page's rel="last" link gives the page count, so fetch the rest concurrently
+    last_url = resp.links.get("last", {}).get("url")
+    if last_url:
+        last_page = int(parse_qs(urlparse(last_url).query)["page"][0])
+
+        def fetch_page(page):
+            page_resp = cached_get(f"{url}&page={page}", headers)
+            page_resp.raise_for_status()
+            return orjson.loads(page_resp.content)
+
+        with ThreadPoolExecutor(max_workers=min(8, last_page - 1)) as executor:
+            for page_repos in executor.map(fetch_page, range(2, last_page + 1)):
+                repos.extend(page_repos)
+    save_etags()
     return repos
 
+@functools.lru_cache(maxsize=None)
 def fetch_readme(username, repo_name, token=None):
     headers = {"Accept": "application/vnd.github.v3.raw"}
     if token:
         headers["Authorization"] = f"token {token}"
     url = f"https://api.github.com/repos/{username}/{repo_name}/readme"
-    resp = requests.get(url, headers=headers)
+    resp = cached_get(url, headers)
     if resp.status_code == 200:
         return resp.text
     return None
 
+def fetch_readmes(username, repo_names, token=None, max_workers=8):
+    # README fetches are latency bound, so run them concurrently over the pooled session
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        readmes = dict(zip(repo_names, executor.map(lambda name: fetch_readme(username, name, token), repo_names)))
+    save_etags()
+    return readmes
+
 def fetch_contributions(username, token=None):
     headers = {"Content-Type": "application/json"}
     if token:
@@ -61,9 +247,9 @@ def fetch_contributions(username, token=None):
       }}
     }}
     """
-    resp = requests.post("https://api.github.com/graphql", headers=headers, json={"query": query})
+    resp = github_request("POST", "https://api.github.com/graphql", headers=headers, data=orjson.dumps({"query": query}))
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
     if "errors" in data:
         raise ValueError(data["errors"])
     return data["data"]["user"]["contributionsCollection"]["contributionCalendar"]
@@ -73,129 +259,238 @@ def fetch_avatar_url(username, token=None):
     if token:
         headers["Authorization"] = f"token {token}"
     url = f"https://api.github.com/users/{username}"
-    resp = requests.get(url, headers=headers)
+    resp = github_request("GET", url, headers=headers)
     resp.raise_for_status()
-    return resp.json()["avatar_url"]
+    return orjson.loads(resp.content)["avatar_url"]
 
+@functools.lru_cache(maxsize=16)
 def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip("#")
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
+# Fallback LaTeX symbol table, ASCII safe, matched in a single pass (longest names first)
+_LATEX_SYMBOLS = {
+    r'\alpha': 'a', r'\beta': 'b', r'\gamma': 'g', r'\delta': 'd',
+    r'\epsilon': 'e', r'\zeta': 'z', r'\eta': 'n', r'\theta': 'th',
+    r'\iota': 'i', r'\kappa': 'k', r'\lambda': 'l', r'\mu': 'm',
+    r'\nu': 'v', r'\xi': 'x', r'\pi': 'p', r'\rho': 'r',
+    r'\sigma': 's', r'\tau': 't', r'\upsilon': 'u', r'\phi': 'ph',
+    r'\chi': 'ch', r'\psi': 'ps', r'\omega': 'o',
+    r'\Gamma': 'G', r'\Delta': 'D', r'\Theta': 'Th', r'\Lambda': 'L',
+    r'\Xi': 'X', r'\Pi': 'P', r'\Sigma': 'S', r'\Upsilon': 'U',
+    r'\Phi': 'Ph', r'\Psi': 'Ps', r'\Omega': 'O',
+    r'\infty': 'inf', r'\pm': '+/-', r'\mp': '-/+', r'\times': 'x',
+    r'\div': '/', r'\leq': '<=', r'\geq': '>=', r'\neq': '!=',
+    r'\approx': '~', r'\equiv': '==', r'\int': 'int', r'\sum': 'sum',
+    r'\prod': 'prod', r'\sqrt': 'sqrt', r'\partial': 'd',
+}
+_LATEX_SYMBOL_RE = re.compile('|'.join(re.escape(k) for k in sorted(_LATEX_SYMBOLS, key=len, reverse=True)))
+_SUP_GROUP_RE = re.compile(r'\^{([^{}]+)}')
+_SUP_CHAR_RE = re.compile(r'\^([a-zA-Z0-9])')
+_SUB_GROUP_RE = re.compile(r'_{([^{}]+)}')
+_SUB_CHAR_RE = re.compile(r'_([a-zA-Z0-9])')
+_FRAC_RE = re.compile(r'\\frac{([^{}]+)}{([^{}]+)}')
+_SYMPY_CONSTRUCTS = (r'\frac', r'\sqrt', r'\int', r'\sum', r'\begin')
+
+@functools.lru_cache(maxsize=4096)
 def latex_to_unicode(tex):
-    try:
-        expr = parse_latex(tex)
-        return pretty(expr)
-    except Exception:
-        # Fallback to manual if parsing fails, ASCII safe
-        symbols = {
-            r'\alpha': 'a', r'\beta': 'b', r'\gamma': 'g', r'\delta': 'd',
-            r'\epsilon': 'e', r'\zeta': 'z', r'\eta': 'n', r'\theta': 'th',
-            r'\iota': 'i', r'\kappa': 'k', r'\lambda': 'l', r'\mu': 'm',
-            r'\nu': 'v', r'\xi': 'x', r'\pi': 'p', r'\rho': 'r',
-            r'\sigma': 's', r'\tau': 't', r'\upsilon': 'u', r'\phi': 'ph',
-            r'\chi': 'ch', r'\psi': 'ps', r'\omega': 'o',
-            r'\Gamma': 'G', r'\Delta': 'D', r'\Theta': 'Th', r'\Lambda': 'L',
-            r'\Xi': 'X', r'\Pi': 'P', r'\Sigma': 'S', r'\Upsilon': 'U',
-            r'\Phi': 'Ph', r'\Psi': 'Ps', r'\Omega': 'O',
-            r'\infty': 'inf', r'\pm': '+/-', r'\mp': '-/+', r'\times': 'x',
-            r'\div': '/', r'\leq': '<=', r'\geq': '>=', r'\neq': '!=',
-            r'\approx': '~', r'\equiv': '==', r'\int': 'int', r'\sum': 'sum',
-            r'\prod': 'prod', r'\sqrt': 'sqrt', r'\partial': 'd',
-        }
-        for k, v in symbols.items():
-            tex = tex.replace(k, v)
-
-        # Superscripts
-        def to_sup(s):
-            return '^' + s
-
-        tex = re.sub(r'\^{([^{}]+)}', lambda m: to_sup(m.group(1)), tex)
-        tex = re.sub(r'\^([a-zA-Z0-9])', lambda m: to_sup(m.group(1)), tex)
-
-        # Subscripts
-        def to_sub(s):
-            return '_' + s
-
-        tex = re.sub(r'_{([^{}]+)}', lambda m: to_sub(m.group(1)), tex)
-        tex = re.sub(r'_([a-zA-Z0-9])', lambda m: to_sub(m.group(1)), tex)
-
-        # Fractions
-        tex = re.sub(r'\\frac{([^{}]+)}{([^{}]+)}', lambda m: m.group(1) + '/' + m.group(2), tex)
-
-        return tex
-
-def process_readme_line(pdf, line, in_code_block, in_inline_code):
-    if line.strip().startswith('```'):
-        return not in_code_block, False
-
-    if in_code_block:
-        pdf.set_font("courier", "", 9)
-        pdf.multi_cell(0, 4, line)
-        return in_code_block, in_inline_code
-
-    stripped_line = line.lstrip()
-    indent = len(line) - len(stripped_line)
-
-    ul_match = re.match(r'([-*+])\s+(.*)', stripped_line)
-    if ul_match:
-        pdf.set_font("helvetica", "", 10)
-        pdf.set_x(10 + indent * 2)
-        pdf.cell(10, 5, '*', 0, 0)
-        process_inline(pdf, ul_match.group(2))
+    # Only structured math is worth sympy's antlr-backed parser (and its import cost);
+    # short inline math like $x^2$ or $\alpha$ goes straight to the regex translation
+    if any(construct in tex for construct in _SYMPY_CONSTRUCTS):
+        try:
+            from sympy.parsing.latex import parse_latex
+            from sympy import pretty
+            return pretty(parse_latex(tex))
+        except Exception:
+            pass
+
+    # Manual translation for simple math or if parsing fails, ASCII safe
+    tex = _LATEX_SYMBOL_RE.sub(lambda m: _LATEX_SYMBOLS[m.group(0)], tex)
+
+    # Superscripts
+    def to_sup(s):
+        return '^' + s
+
+    tex = _SUP_GROUP_RE.sub(lambda m: to_sup(m.group(1)), tex)
+    tex = _SUP_CHAR_RE.sub(lambda m: to_sup(m.group(1)), tex)
+
+    # Subscripts
+    def to_sub(s):
+        return '_' + s
+
+    tex = _SUB_GROUP_RE.sub(lambda m: to_sub(m.group(1)), tex)
+    tex = _SUB_CHAR_RE.sub(lambda m: to_sub(m.group(1)), tex)
+
+    # Fractions
+    tex = _FRAC_RE.sub(lambda m: m.group(1) + '/' + m.group(2), tex)
+
+    return tex
+
+def unescape_text(raw, strip_tags=False):
+    # mistune keeps entities (and inline HTML) raw; decode them for the PDF, turn soft
+    # line breaks into spaces and replace anything the latin-1 core fonts can't encode
+    if strip_tags:
+        raw = _HTML_TAG_RE.sub('', raw)
+    return html.unescape(raw).replace('\n', ' ').encode('latin-1', 'replace').decode('latin-1')
+
+def inline_text(children):
+    # Plain text of an inline token list, for places that can't switch fonts mid-line
+    parts = []
+    for token in children:
+        if "children" in token:
+            parts.append(inline_text(token["children"]))
+        elif token["type"] == "inline_math":
+            parts.append(latex_to_unicode(token["raw"]))
+        elif token["type"] == "text":
+            parts.append(unescape_text(token["raw"]))
+        elif token["type"] == "inline_html":
+            parts.append(unescape_text(token["raw"], strip_tags=True))
+        elif "raw" in token:
+            parts.append(token["raw"])
+        elif token["type"] in ("softbreak", "linebreak"):
+            parts.append(" ")
+    return "".join(parts)
+
+def process_inline(pdf, children, style=""):
+    # Adjacent plain text is buffered and written in one call; fpdf's write() dominates render time
+    pending = []
+    for token in children:
+        kind = token["type"]
+        if kind == "text":
+            pending.append(unescape_text(token["raw"]))
+            continue
+        if kind == "softbreak":
+            pending.append(" ")
+            continue
+        if pending:
+            pdf.set_font("helvetica", style, 10)
+            pdf.write(5, "".join(pending))
+            pending = []
+        if kind == "inline_html":
+            text = unescape_text(token["raw"], strip_tags=True)
+            if text:
+                pdf.set_font("helvetica", style, 10)
+                pdf.write(5, text)
+        elif kind == "strong":
+            process_inline(pdf, token["children"], style if "B" in style else style + "B")
+        elif kind == "emphasis":
+            process_inline(pdf, token["children"], style if "I" in style else style + "I")
+        elif kind == "strikethrough":
+            process_inline(pdf, token["children"], style)
+        elif kind == "codespan":
+            pdf.set_font("courier", "", 9)
+            pdf.write(5, token["raw"])
+        elif kind == "inline_math":
+            pdf.set_font("helvetica", "I", 10)
+            pdf.write(5, latex_to_unicode(token["raw"]))
+        elif kind in ("link", "image"):
+            pdf.set_font("helvetica", style + "U", 10)
+            pdf.set_text_color(0, 0, 255)
+            pdf.write(5, inline_text(token["children"]) or token["attrs"]["url"], link=token["attrs"]["url"])
+            pdf.set_text_color(0, 0, 0)
+        elif kind == "linebreak":
+            pdf.ln(5)
+    if pending:
+        pdf.set_font("helvetica", style, 10)
+        pdf.write(5, "".join(pending))
+
+def process_table(pdf, token):
+    head, body = token["children"][0], token["children"][1:]
+    rows = [(head["children"], "B")] + [(row["children"], "") for part in body for row in part["children"]]
+    col_w = (pdf.w - pdf.l_margin - pdf.r_margin) / len(head["children"])
+    for cells, style in rows:
+        pdf.set_font("helvetica", style, 10)
+        for cell in cells:
+            text = inline_text(cell["children"])
+            while text and pdf.get_string_width(text) > col_w - 2:
+                text = text[:-1]
+            pdf.cell(col_w, 6, text, border=1)
+        pdf.ln(6)
+    pdf.ln(2)
+
+def process_block(pdf, token):
+    kind = token["type"]
+    if kind == "heading":
+        size = max(16 - token["attrs"]["level"] * 2, 10)
+        pdf.set_font("helvetica", "B", size)
+        pdf.multi_cell(0, size / 2 + 4, inline_text(token["children"]))
+    elif kind in ("paragraph", "block_text"):
+        process_inline(pdf, token["children"])
         pdf.ln(5)
-        return in_code_block, in_inline_code
-
-    ol_match = re.match(r'(\d+)\.\s+(.*)', stripped_line)
-    if ol_match:
-        pdf.set_font("helvetica", "", 10)
-        pdf.set_x(10 + indent * 2)
-        pdf.cell(10, 5, ol_match.group(1) + '.', 0, 0)
-        process_inline(pdf, ol_match.group(2))
+        if kind == "paragraph":
+            pdf.ln(2)
+    elif kind == "block_code":
+        pdf.set_font("courier", "", 9)
+        pdf.multi_cell(0, 4, token["raw"].rstrip("\n"))
+        pdf.ln(2)
+    elif kind == "block_math":
+        pdf.set_font("helvetica", "I", 10)
+        pdf.multi_cell(0, 5, latex_to_unicode(token["raw"].strip()))
+    elif kind == "list":
+        # Items hang off a widened left margin so wrapped lines stay indented
+        margin = pdf.l_margin
+        number = token["attrs"].get("start", 1)
+        for item in token["children"]:
+            pdf.set_x(margin)
+            pdf.set_font("helvetica", "", 10)
+            pdf.cell(10, 5, f"{number}." if token["attrs"]["ordered"] else "*")
+            pdf.set_left_margin(margin + 10)
+            for child in item["children"]:
+                process_block(pdf, child)
+            if not item["children"]:
+                pdf.ln(5)
+            pdf.set_left_margin(margin)
+            pdf.set_x(margin)
+            number += 1
+    elif kind == "block_quote":
+        margin = pdf.l_margin
+        pdf.set_left_margin(margin + 5)
+        pdf.set_x(margin + 5)
+        for child in token["children"]:
+            process_block(pdf, child)
+        pdf.set_left_margin(margin)
+        pdf.set_x(margin)
+    elif kind == "table":
+        process_table(pdf, token)
+    elif kind == "thematic_break":
+        y = pdf.get_y() + 2
+        pdf.line(pdf.l_margin, y, pdf.w - pdf.r_margin, y)
         pdf.ln(5)
-        return in_code_block, in_inline_code
-
-    header_match = re.match(r'^(#{1,6})\s+(.*)', stripped_line)
-    if header_match:
-        level = len(header_match.group(1))
-        size = max(16 - level * 2, 10)
-        pdf.set_font("helvetica", "B", size)
-        pdf.set_x(10 + indent * 2)
-        pdf.multi_cell(0, size / 2 + 4, header_match.group(2))
-        return in_code_block, in_inline_code
-
-    pdf.set_x(10 + indent * 2)
-    process_inline(pdf, stripped_line)
-    pdf.ln(5)
-    return in_code_block, in_inline_code
-
-def process_inline(pdf, text):
-    math_parts = re.split(r'\$([^$]+)\$', text)
-    for m, mpart in enumerate(math_parts):
-        if m % 2 == 1:
-            math_text = latex_to_unicode(mpart)
-            pdf.set_font("helvetica", "I", 10)
-            pdf.multi_cell(0, 5, math_text)
-            continue
+    elif kind == "block_html":
+        # Keep the text of HTML blocks (e.g. a centered <h1> title) without the markup
+        text = " ".join(unescape_text(token["raw"], strip_tags=True).split())
+        if text:
+            pdf.set_font("helvetica", "", 10)
+            pdf.multi_cell(0, 5, text)
+            pdf.ln(2)
+
+def process_markdown(pdf, text):
+    # Parse once into mistune's AST and map each node onto fpdf calls
+    for token in _MARKDOWN_AST(text):
+        process_block(pdf, token)
+
+@dataclass
+class RenderPlan:
+    sorted_repos: list
+    readmes: dict
+
+def build_render_plan(username, repos, prioritize, exclude, token=None):
+    # Order and README prefetch shared by every output format
+    priority = {}
+    for i, name in enumerate(prioritize):
+        priority.setdefault(name, i)
+    exclude = set(exclude)
+    prio_repos = [r for r in repos if r["name"] in priority]
+    prio_repos.sort(key=lambda r: priority[r["name"]])
+    other_repos = [r for r in repos if r["name"] not in priority and r["name"] not in exclude]
+    other_repos.sort(key=lambda r: r["stargazers_count"], reverse=True)
+    sorted_repos = prio_repos + other_repos
+    readmes = fetch_readmes(username, [r["name"] for r in sorted_repos], token)
+    return RenderPlan(sorted_repos, readmes)
 
-        code_parts = re.split(r'`(?!`)([^`]+)`', mpart)
-        for c, cpart in enumerate(code_parts):
-            if c % 2 == 1:
-                pdf.set_font("courier", "", 9)
-                pdf.multi_cell(0, 5, cpart)
-                continue
-
-            bold_parts = re.split(r'\*\*(.*?)\*\*', cpart)
-            for b, bpart in enumerate(bold_parts):
-                if b % 2 == 1:
-                    pdf.set_font("helvetica", "B", 10)
-                else:
-                    pdf.set_font("helvetica", "", 10)
-                if bpart:
-                    pdf.multi_cell(0, 5, bpart)
-
-def generate_pdf(username, repos, contrib, prioritize, exclude, output, avatar_url):
+def generate_pdf(username, plan, contrib, output, avatar_url):
     # Download avatar to temp file
-    response = requests.get(avatar_url)
+    response = SESSION.get(avatar_url)
     content_type = response.headers['content-type']
     ext = content_type.split('/')[-1]  # e.g., 'png' or 'jpeg'
     suffix = '.' + ext if ext in ['png', 'jpeg', 'jpg', 'gif'] else '.png'  # Default to png if unknown
@@ -203,119 +498,12 @@ def generate_pdf(username, repos, contrib, prioritize, exclude, output, avatar_u
         temp_file.write(response.content)
         temp_avatar_path = temp_file.name
 
-    # Prepare sorted repos
-    prio_repos = [r for r in repos if r["name"] in prioritize]
-    prio_repos.sort(key=lambda r: prioritize.index(r["name"]))
-    other_repos = [r for r in repos if r["name"] not in prioritize and r["name"] not in exclude]
-    other_repos.sort(key=lambda r: r["stargazers_count"], reverse=True)
-    sorted_repos = prio_repos + other_repos
-
     toc_entries = []
     if contrib:
         toc_entries.append("Contribution Calendar")
-    for repo in sorted_repos:
+    for repo in plan.sorted_repos:
         toc_entries.append(repo["name"])
 
-    # Generate content and record relative pages
-    content_pdf = PDF()
-    content_pdf.add_page()
-    rel_pages = []
-    links = []  # Not used in content_pdf
-
-    if contrib:
-        rel_pages.append(content_pdf.page_no())
-        content_pdf.set_font("helvetica", "B", 12)
-        content_pdf.cell(0, 10, "Contribution Calendar", align="C")
-        content_pdf.ln(15)  # Increased space to avoid overlap
-        square_size = 3
-        spacing = 0.5
-        weeks = contrib["weeks"][1:]
-        num_weeks = len(weeks)
-
-        # Draw month labels above
-        current_month = None
-        start_x = 20
-        calendar_y = content_pdf.get_y()
-        for w, week in enumerate(weeks):
-            month_x = start_x + w * (square_size + spacing)
-            if week["contributionDays"]:
-                first_day = week["contributionDays"][0]
-                date = datetime.date.fromisoformat(first_day["date"])
-                month = date.strftime("%b")
-                if month != current_month:
-                    content_pdf.set_font("helvetica", size=8)
-                    content_pdf.text(month_x, calendar_y - 2, month)
-                    current_month = month
-
-        days = ["", "Mon", "", "Wed", "", "Fri", "" ]
-        content_pdf.set_font("helvetica", size=8)
-        for d in range(7):
-            y = calendar_y + d * (square_size + spacing) + square_size / 2
-            content_pdf.text(5, y, days[d])
-
-        for w, week in enumerate(weeks):
-            for d, day in enumerate(week["contributionDays"]):
-                x = start_x + w * (square_size + spacing)
-                y = calendar_y + d * (square_size + spacing)
-                r, g, b = hex_to_rgb(day["color"])
-                content_pdf.set_fill_color(r, g, b)
-                content_pdf.rect(x, y, square_size, square_size, "F")
-        content_pdf.set_y(calendar_y + 7 * (square_size + spacing) + 10)
-        content_pdf.ln(10)
-
-    for repo in sorted_repos:
-        rel_pages.append(content_pdf.page_no())
-        content_pdf.set_font("helvetica", "B", 14)
-        content_pdf.cell(0, 10, repo["name"])
-        content_pdf.ln(10)
-        content_pdf.set_font("helvetica", "", 12)
-        desc = repo["description"] or "No description"
-        content_pdf.multi_cell(0, 10, desc)
-        content_pdf.set_font("helvetica", "U", 12)
-        content_pdf.set_text_color(0, 0, 255)
-        content_pdf.cell(0, 10, repo["name"], link=repo["html_url"])
-        content_pdf.ln(10)
-        content_pdf.set_text_color(0, 0, 0)
-        content_pdf.set_font("helvetica", "", 12)
-        readme = fetch_readme(username, repo["name"])
-        if readme:
-            content_pdf.set_font("helvetica", "B", 12)
-            content_pdf.cell(0, 10, "README:")
-            content_pdf.ln(10)
-            lines = readme.split('\n')
-            in_code_block = False
-            in_inline_code = False
-            for line in lines:
-                in_code_block, in_inline_code = process_readme_line(content_pdf, line, in_code_block, in_inline_code)
-        content_pdf.ln(10)
-
-    # Now iterate to find TOC pages
-    assumed_toc_pages = 1
-    while True:
-        content_start = 1 + assumed_toc_pages
-        abs_pages = [rel + content_start - 1 for rel in rel_pages]
-
-        toc_pdf = PDF()
-        toc_pdf.add_page()
-        toc_pdf.set_font("helvetica", "B", 12)
-        toc_pdf.cell(0, 10, "Table of Contents", align="C")
-        toc_pdf.ln(10)
-        toc_pdf.set_font("helvetica", "", 12)
-        for i, entry in enumerate(toc_entries):
-            w = toc_pdf.get_string_width(entry) + 6
-            toc_pdf.cell(w, 5, entry)
-            dot_w = 170 - w
-            dots = '.' * (int(dot_w / toc_pdf.get_string_width('.')) - 1)
-            toc_pdf.cell(dot_w, 5, dots)
-            toc_pdf.cell(10, 5, str(abs_pages[i]), align='R')
-            toc_pdf.ln(5)
-
-        actual_toc_pages = toc_pdf.page_no()
-        if actual_toc_pages == assumed_toc_pages:
-            break
-        assumed_toc_pages = actual_toc_pages
-
-    # Now build final PDF
     final_pdf = PDF()
     # Title page
     final_pdf.add_page()
@@ -325,31 +513,26 @@ def generate_pdf(username, repos, contrib, prioritize, exclude, output, avatar_u
     # Add avatar
     final_pdf.image(temp_avatar_path, x=80, y=final_pdf.get_y(), w=50, h=50)
 
-    # TOC pages
+    # Reserve TOC pages, filled in once section pages are known. TOC rows are
+    # 5mm each, below a 10mm heading on the first page
+    toc_body = final_pdf.page_break_trigger - final_pdf.t_margin
+    toc_first_rows = int((toc_body - 10) // 5)
+    toc_rows = int(toc_body // 5)
+    toc_page_count = 1 + math.ceil(max(len(toc_entries) - toc_first_rows, 0) / toc_rows)
     final_pdf.add_page()
-    links = []
-    final_pdf.set_font("helvetica", "B", 12)
-    final_pdf.cell(0, 10, "Table of Contents", align="C")
-    final_pdf.ln(10)
-    final_pdf.set_font("helvetica", "", 12)
-    for i, entry in enumerate(toc_entries):
-        link = final_pdf.add_link()
-        links.append(link)
-        w = final_pdf.get_string_width(entry) + 6
-        final_pdf.cell(w, 5, entry, link=link)
-        dot_w = 170 - w
-        dots = '.' * (int(dot_w / final_pdf.get_string_width('.')) - 1)
-        final_pdf.cell(dot_w, 5, dots)
-        final_pdf.cell(10, 5, str(abs_pages[i]), align='R')
-        final_pdf.ln(5)
+    toc_page = final_pdf.page_no()
+    for _ in range(toc_page_count - 1):
+        final_pdf.add_page()
 
     # Content
     final_pdf.add_page()
-    idx = 0
+    links = []
+    section_pages = []
     if contrib:
-        section_page = final_pdf.page_no()
-        final_pdf.set_link(links[idx], page=section_page)
-        idx += 1
+        link = final_pdf.add_link()
+        final_pdf.set_link(link, page=final_pdf.page_no())
+        links.append(link)
+        section_pages.append(final_pdf.page_no())
         final_pdf.set_font("helvetica", "B", 12)
         final_pdf.cell(0, 10, "Contribution Calendar", align="C")
         final_pdf.ln(15)  # Increased space to avoid overlap
@@ -358,40 +541,44 @@ def generate_pdf(username, repos, contrib, prioritize, exclude, output, avatar_u
         weeks = contrib["weeks"][1:]
         num_weeks = len(weeks)
 
+        # Draw month labels above
         current_month = None
         start_x = 20
         calendar_y = final_pdf.get_y()
+        final_pdf.set_font("helvetica", size=8)
         for w, week in enumerate(weeks):
             month_x = start_x + w * (square_size + spacing)
             if week["contributionDays"]:
                 first_day = week["contributionDays"][0]
-                date = datetime.date.fromisoformat(first_day["date"])
-                month = date.strftime("%b")
+                month = _MONTHS[int(first_day["date"][5:7]) - 1]
                 if month != current_month:
-                    final_pdf.set_font("helvetica", size=8)
                     final_pdf.text(month_x, calendar_y - 2, month)
                     current_month = month
 
         days = ["", "Mon", "", "Wed", "", "Fri", "" ]
-        final_pdf.set_font("helvetica", size=8)
         for d in range(7):
             y = calendar_y + d * (square_size + spacing) + square_size / 2
             final_pdf.text(5, y, days[d])
 
+        # Group days by color so each color is set once and its squares drawn in one batch
+        by_color = {}
         for w, week in enumerate(weeks):
             for d, day in enumerate(week["contributionDays"]):
                 x = start_x + w * (square_size + spacing)
                 y = calendar_y + d * (square_size + spacing)
-                r, g, b = hex_to_rgb(day["color"])
-                final_pdf.set_fill_color(r, g, b)
-                final_pdf.rect(x, y, square_size, square_size, "F")
+                by_color.setdefault(day["color"], []).append((x, y))
+        for color, points in by_color.items():
+            r, g, b = hex_to_rgb(color)
+            final_pdf.set_fill_color(r, g, b)
+            final_pdf.fill_squares(points, square_size)
         final_pdf.set_y(calendar_y + 7 * (square_size + spacing) + 10)
         final_pdf.ln(10)
 
-    for repo in sorted_repos:
-        section_page = final_pdf.page_no()
-        final_pdf.set_link(links[idx], page=section_page)
-        idx += 1
+    for repo in plan.sorted_repos:
+        link = final_pdf.add_link()
+        final_pdf.set_link(link, page=final_pdf.page_no())
+        links.append(link)
+        section_pages.append(final_pdf.page_no())
         final_pdf.set_font("helvetica", "B", 14)
         final_pdf.cell(0, 10, repo["name"])
         final_pdf.ln(10)
@@ -404,79 +591,105 @@ def generate_pdf(username, repos, contrib, prioritize, exclude, output, avatar_u
         final_pdf.ln(10)
         final_pdf.set_text_color(0, 0, 0)
         final_pdf.set_font("helvetica", "", 12)
-        readme = fetch_readme(username, repo["name"])
+        readme = plan.readmes.get(repo["name"])
         if readme:
             final_pdf.set_font("helvetica", "B", 12)
             final_pdf.cell(0, 10, "README:")
             final_pdf.ln(10)
-            lines = readme.split('\n')
-            in_code_block = False
-            in_inline_code = False
-            for line in lines:
-                in_code_block, in_inline_code = process_readme_line(final_pdf, line, in_code_block, in_inline_code)
+            process_markdown(final_pdf, readme)
         final_pdf.ln(10)
 
+    # Go back and draw the TOC onto the reserved pages, advancing by hand
+    # since an automatic page break would append a page at the end instead
+    last_page = final_pdf.page_no()
+    final_pdf.set_auto_page_break(False, final_pdf.b_margin)
+    final_pdf.page = toc_page
+    final_pdf.set_y(final_pdf.t_margin)
+    final_pdf.font_family = ''  # Force the font to be re-emitted on this page
+    final_pdf.set_font("helvetica", "B", 12)
+    final_pdf.cell(0, 10, "Table of Contents", align="C")
+    final_pdf.ln(10)
+    final_pdf.set_font("helvetica", "", 12)
+    # Dot leaders are sliced from one prebuilt string sized for the widest gap
+    dot_width = final_pdf.get_string_width('.')
+    max_dots = '.' * int(170 / dot_width)
+    rows_left = toc_first_rows
+    for i, entry in enumerate(toc_entries):
+        if rows_left == 0:
+            final_pdf.page += 1
+            final_pdf.set_y(final_pdf.t_margin)
+            final_pdf.font_family = ''
+            final_pdf.set_font("helvetica", "", 12)
+            rows_left = toc_rows
+        rows_left -= 1
+        w = final_pdf.get_string_width(entry) + 6
+        final_pdf.cell(w, 5, entry, link=links[i])
+        dot_w = 170 - w
+        final_pdf.cell(dot_w, 5, max_dots[:max(int(dot_w / dot_width) - 1, 0)])
+        final_pdf.cell(10, 5, str(section_pages[i]), align='R')
+        final_pdf.ln(5)
+    final_pdf.page = last_page
+    final_pdf.set_auto_page_break(True, final_pdf.b_margin)
+
     final_pdf.output(output)
     os.unlink(temp_avatar_path)  # Clean up temp file
 
-def generate_html(username, repos, contrib, prioritize, exclude, output, avatar_url):
-    with open(output, "w") as f:
-        f.write("<html><head><title>{}'s GitHub Portfolio</title></head><body>\n".format(username))
-        f.write("<h1>{}'s GitHub Portfolio</h1>\n".format(username))
-        f.write('<img src="{}" alt="Profile Picture" width="100" height="100">\n'.format(avatar_url))
-        if contrib:
-            f.write("<h2>Contribution Calendar</h2>\n")
-            weeks = contrib["weeks"]
-            num_weeks = len(weeks)
-            f.write('<div style="display: grid; grid-template-columns: repeat({}, 10px); grid-auto-rows: 10px; gap: 2px;">\n'.format(num_weeks))
-            for week in weeks:
-                for day in week["contributionDays"]:
-                    color = day["color"]
-                    title = "{}: {} contributions".format(day["date"], day["contributionCount"])
-                    f.write('<div style="background-color: {}; " title="{}"></div>\n'.format(color, title))
-            f.write("</div>\n")
-
-        prio_repos = [r for r in repos if r["name"] in prioritize]
-        prio_repos.sort(key=lambda r: prioritize.index(r["name"]))
-        other_repos = [r for r in repos if r["name"] not in prioritize and r["name"] not in exclude]
-        other_repos.sort(key=lambda r: r["stargazers_count"], reverse=True)
-        sorted_repos = prio_repos + other_repos
-
-        for repo in sorted_repos:
-            f.write("<h2>{}</h2>\n".format(repo["name"]))
-            desc = repo["description"] or "No description"
-            f.write("<p>{}</p>\n".format(desc))
-            f.write('<a href="{}">Link</a>\n'.format(repo["html_url"]))
-            readme = fetch_readme(username, repo["name"])
-            if readme:
-                f.write("<h3>README</h3>\n")
-                f.write("<pre>{}</pre>\n".format(readme))
-        f.write("</body></html>")
-
-def generate_md(username, repos, contrib, prioritize, exclude, output, avatar_url):
-    with open(output, "w") as f:
-        f.write("# {}'s GitHub Portfolio\n\n".format(username))
-        f.write("![Profile Picture]({})\n\n".format(avatar_url))
-        if contrib:
-            f.write("## Contribution Calendar\n\n")
-            f.write("Total contributions in the last year: {}\n\n".format(contrib["totalContributions"]))
-            # Visual not supported, just summary
-
-        prio_repos = [r for r in repos if r["name"] in prioritize]
-        prio_repos.sort(key=lambda r: prioritize.index(r["name"]))
-        other_repos = [r for r in repos if r["name"] not in prioritize and r["name"] not in exclude]
-        other_repos.sort(key=lambda r: r["stargazers_count"], reverse=True)
-        sorted_repos = prio_repos + other_repos
-
-        for repo in sorted_repos:
-            f.write("## {}\n\n".format(repo["name"]))
-            desc = repo["description"] or "No description"
-            f.write("{}\n\n".format(desc))
-            f.write("[Link]({})\n\n".format(repo["html_url"]))
-            readme = fetch_readme(username, repo["name"])
-            if readme:
-                f.write("### README\n\n")
-                f.write("{}\n\n".format(readme))
+def generate_html(username, plan, contrib, output, avatar_url):
+    # Build the page as a list of parts and write it out in one call
+    name = html.escape(username)
+    parts = [
+        f"<html><head><title>{name}'s GitHub Portfolio</title></head><body>\n",
+        f"<h1>{name}'s GitHub Portfolio</h1>\n",
+        f'<img src="{html.escape(avatar_url)}" alt="Profile Picture" width="100" height="100">\n',
+    ]
+    if contrib:
+        parts.append("<h2>Contribution Calendar</h2>\n")
+        weeks = contrib["weeks"]
+        num_weeks = len(weeks)
+        parts.append(f'<div style="display: grid; grid-template-columns: repeat({num_weeks}, 10px); grid-auto-rows: 10px; gap: 2px;">\n')
+        for week in weeks:
+            for day in week["contributionDays"]:
+                title = f"{day['date']}: {day['contributionCount']} contributions"
+                parts.append(f'<div style="background-color: {day["color"]}; " title="{title}"></div>\n')
+        parts.append("</div>\n")
+
+    for repo in plan.sorted_repos:
+        parts.append(f"<h2>{html.escape(repo['name'])}</h2>\n")
+        desc = repo["description"] or "No description"
+        parts.append(f"<p>{html.escape(desc)}</p>\n")
+        parts.append(f'<a href="{html.escape(repo["html_url"])}">Link</a>\n')
+        readme = plan.readmes.get(repo["name"])
+        if readme:
+            parts.append("<h3>README</h3>\n")
+            parts.append(f"{_MARKDOWN_HTML(readme)}\n")
+    parts.append("</body></html>")
+
+    with open(output, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("".join(parts))
+
+def generate_md(username, plan, contrib, output, avatar_url):
+    # Build the document as a list of parts and write it out in one call
+    parts = [
+        f"# {username}'s GitHub Portfolio\n\n",
+        f"![Profile Picture]({avatar_url})\n\n",
+    ]
+    if contrib:
+        parts.append("## Contribution Calendar\n\n")
+        parts.append(f"Total contributions in the last year: {contrib['totalContributions']}\n\n")
+        # Visual not supported, just summary
+
+    for repo in plan.sorted_repos:
+        parts.append(f"## {repo['name']}\n\n")
+        desc = repo["description"] or "No description"
+        parts.append(f"{desc}\n\n")
+        parts.append(f"[Link]({repo['html_url']})\n\n")
+        readme = plan.readmes.get(repo["name"])
+        if readme:
+            parts.append("### README\n\n")
+            parts.append(f"{readme}\n\n")
+
+    with open(output, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("".join(parts))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate a GitHub portfolio in PDF, HTML, or Markdown.")
@@ -492,18 +705,19 @@ if __name__ == "__main__":
     repos = fetch_repos(args.username, args.token)
     contrib = None if args.no_calendar else fetch_contributions(args.username, args.token)
     avatar_url = fetch_avatar_url(args.username, args.token)
+    plan = build_render_plan(args.username, repos, args.prioritize, args.exclude, args.token)
 
     if args.format == "pdf":
         if not args.output.endswith(".pdf"):
             args.output += ".pdf"
-        generate_pdf(args.username, repos, contrib, args.prioritize, args.exclude, args.output, avatar_url)
+        generate_pdf(args.username, plan, contrib, args.output, avatar_url)
     elif args.format == "html":
         if not args.output.endswith(".html"):
             args.output += ".html"
-        generate_html(args.username, repos, contrib, args.prioritize, args.exclude, args.output, avatar_url)
+        generate_html(args.username, plan, contrib, args.output, avatar_url)
     elif args.format == "md":
         if not args.output.endswith(".md"):
             args.output += ".md"
-        generate_md(args.username, repos, contrib, args.prioritize, args.exclude, args.output, avatar_url)
+        generate_md(args.username, plan, contrib, args.output, avatar_url)
 
     print(f"Portfolio generated: {args.output}")
\ No newline at end of file